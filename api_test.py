@@ -4,10 +4,21 @@ HubSpot API Explorer - Get acquainted with the HubSpot API
 Tests various endpoints and shows you what data is available
 """
 
-import requests
+import aiohttp
+import argparse
+import asyncio
+import contextvars
+import functools
+import hashlib
+import ijson
+import io
+import orjson
 import os
 import sys
-import json
+import time
+from aiolimiter import AsyncLimiter
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 
 # --- CONFIGURATION ---
@@ -22,6 +33,44 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+# One keep-alive pool for every test, so connections (and their TLS
+# handshakes) to api.hubapi.com are reused instead of re-established.
+POOL_SIZE = 10
+
+# On-disk response cache, so re-running the explorer doesn't re-hit every
+# endpoint. TTLs in seconds by URL prefix (first match wins); anything else
+# (searches, engagements, logins) uses the short default.
+# Entries are full response bodies (names, emails, contact data), so the
+# directory and files are readable by the current user only, and keys
+# include a hash of the token so one portal's entries never serve another.
+# Set HUBSPOT_NOCACHE=1 to bypass it.
+CACHE_DIR = ".hubspot_cache"
+CACHE_TOKEN_KEY = hashlib.sha1(TOKEN.encode()).hexdigest()
+CACHE_ENABLED = not os.getenv("HUBSPOT_NOCACHE")
+CACHE_TTLS = [
+    ("https://api.hubapi.com/crm/v3/properties/", 3600),
+    ("https://api.hubapi.com/crm/v3/owners/", 600),
+]
+DEFAULT_CACHE_TTL = 30
+
+# Rate limits (429) and transient server errors are retried with exponential
+# backoff; HubSpot's Retry-After header wins when present. Either wait is
+# capped at BACKOFF_MAX seconds.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+BACKOFF_MAX = 30
+
+# Set HUBSPOT_ALL_PAGES=1 to page through every matching CRM record instead
+# of showing the first few. HubSpot search stops at 10,000 results.
+FETCH_ALL_PAGES = bool(os.getenv("HUBSPOT_ALL_PAGES"))
+SEARCH_RESULT_CAP = 10000
+
+# CRM search allows about 4 requests per second per token. Searches (such as
+# paginate_search's concurrent pages) are spaced a quarter second apart
+# rather than let out in bursts.
+_search_rate_limiter = AsyncLimiter(1, 0.25)
+
 def print_section(title):
     """Print a formatted section header."""
     print(f"\n{'='*70}")
@@ -33,282 +82,487 @@ def print_json(data, max_items=3):
     if isinstance(data, list):
         print(f"  Found {len(data)} items. Showing first {min(len(data), max_items)}:")
         for item in data[:max_items]:
-            print(json.dumps(item, indent=2))
+            print(orjson.dumps(item, option=orjson.OPT_INDENT_2).decode())
     else:
-        print(json.dumps(data, indent=2))
+        print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+
+# Each test runs as its own task; output is captured per task so the
+# concurrent tests still print as readable, ordered sections.
+_task_output = contextvars.ContextVar("task_output", default=None)
 
-def make_request(url, method="GET", **kwargs):
-    """Make API request with error handling."""
+class _TaskAwareStdout:
+    """Route writes to the current task's buffer, if it has one."""
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        buf = _task_output.get()
+        return (buf if buf is not None else self._stream).write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+@contextmanager
+def captured_output():
+    """Collect everything printed in this context (in this task) into a buffer."""
+    buf = io.StringIO()
+    token = _task_output.set(buf)
     try:
-        if method == "GET":
-            resp = requests.get(url, headers=HEADERS, timeout=10, **kwargs)
-        elif method == "POST":
-            resp = requests.post(url, headers=HEADERS, timeout=10, **kwargs)
-        
-        resp.raise_for_status()
-        return resp.json()
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 403:
-            print(f"  ⚠️  403 Forbidden - Missing scope or insufficient permissions")
-            return None
-        print(f"  ❌ Error {e.response.status_code}: {e.response.text}")
+        yield buf
+    finally:
+        _task_output.reset(token)
+
+@contextmanager
+def buffered_out():
+    """Print a block of output with a single write to stdout."""
+    with captured_output() as buf:
+        yield
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+
+async def run_captured(test, session):
+    """Run a test coroutine and return everything it printed."""
+    with captured_output() as buf:
+        await test(session)
+    return buf.getvalue()
+
+def create_session():
+    """Create the shared HTTP session used by all tests.
+
+    aiohttp advertises and decodes brotli (`Accept-Encoding: br`) on its own
+    when the Brotli package is installed, which shrinks the JSON bodies
+    further than gzip.
+    """
+    connector = aiohttp.TCPConnector(limit=POOL_SIZE, limit_per_host=POOL_SIZE, keepalive_timeout=30)
+    return aiohttp.ClientSession(
+        headers=HEADERS,
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=10),
+    )
+
+@functools.lru_cache(maxsize=8)
+def cutoff_ms(days):
+    """Epoch-ms string for `days` ago, truncated to the minute.
+
+    Computed once per process; the truncation keeps search payloads (and so
+    their cache keys) stable between runs a few seconds apart.
+    """
+    cutoff = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(days=days)
+    return str(int(cutoff.timestamp() * 1000))
+
+def cache_key(method, url, params=None, body=None, max_items=None):
+    """Stable cache key for a request."""
+    if isinstance(body, bytes):
+        body = body.decode()
+    raw = orjson.dumps([CACHE_TOKEN_KEY, method, url, sorted((params or {}).items()), body, max_items],
+                       option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha1(raw).hexdigest()
+
+def cache_ttl(url):
+    """Look up the TTL for a URL."""
+    for prefix, ttl in CACHE_TTLS:
+        if url.startswith(prefix):
+            return ttl
+    return DEFAULT_CACHE_TTL
+
+def cache_get(key, ttl):
+    """Return cached response data, or None if missing or expired."""
+    try:
+        with open(os.path.join(CACHE_DIR, f"{key}.json"), "rb") as f:
+            entry = orjson.loads(f.read())
+    except (OSError, ValueError):
         return None
-    except requests.exceptions.RequestException as e:
-        print(f"  ❌ Request failed: {e}")
+    if time.time() - entry.get('stored_at', 0) > ttl:
         return None
+    return entry.get('data')
+
+def cache_put(key, data):
+    """Store response data in the cache."""
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(fd, "wb") as f:
+        f.write(orjson.dumps({'stored_at': time.time(), 'data': data}))
+    os.replace(f"{path}.tmp", path)
+
+async def stream_results(resp, max_items):
+    """Parse at most `max_items` entries of a response's `results` array.
+
+    The body is parsed incrementally, so nested data after the last wanted
+    item is never read or turned into Python objects.
+    """
+    items = []
+    if max_items > 0:
+        async for item in ijson.items(resp.content, "results.item", use_float=True):
+            items.append(item)
+            if len(items) >= max_items:
+                break
+    return {'results': items}
+
+async def make_request(session, url, method="GET", max_items=None, **kwargs):
+    """Make API request with error handling and response caching.
+
+    With `max_items`, only that many `results` are parsed and the return
+    value is just {'results': [...]} (see stream_results).
+    """
+    body = kwargs.get('json', kwargs.get('data'))
+    key = cache_key(method, url, kwargs.get('params'), body, max_items)
+    if CACHE_ENABLED:
+        data = cache_get(key, cache_ttl(url))
+        if data is not None:
+            return data
+    data = await fetch(session, url, method, max_items, **kwargs)
+    if data is not None and CACHE_ENABLED:
+        cache_put(key, data)
+    return data
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (0-based)."""
+    try:
+        return min(float(retry_after), BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return min(BACKOFF_FACTOR * 2 ** attempt, BACKOFF_MAX)
+
+async def fetch(session, url, method, max_items, **kwargs):
+    """Send the request, retrying rate limits, 5xx and network errors."""
+    is_search = url.endswith("/search")
+    for attempt in range(MAX_RETRIES + 1):
+        last_try = attempt == MAX_RETRIES
+        try:
+            # Wait for a search slot before the request starts, so time spent
+            # queued doesn't count against the request timeout
+            if is_search:
+                await _search_rate_limiter.acquire()
+            async with session.request(method, url, **kwargs) as resp:
+                if resp.status in RETRY_STATUSES and not last_try:
+                    delay = retry_delay(attempt, resp.headers.get("Retry-After"))
+                elif resp.status == 403:
+                    print(f"  ⚠️  403 Forbidden - Missing scope or insufficient permissions")
+                    return None
+                elif resp.status >= 400:
+                    print(f"  ❌ Error {resp.status}: {await resp.text()}")
+                    return None
+                elif max_items is None:
+                    return orjson.loads(await resp.read())
+                else:
+                    return await stream_results(resp, max_items)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if last_try:
+                print(f"  ❌ Request failed: {e!r}")
+                return None
+            delay = retry_delay(attempt)
+        except (orjson.JSONDecodeError, ijson.JSONError) as e:
+            print(f"  ❌ Invalid JSON in response: {e}")
+            return None
+        await asyncio.sleep(delay)
 
 # =============================================================================
 # TEST 1: Account Info / Owners
 # =============================================================================
-def test_owners():
+async def test_owners(session):
     print_section("TEST 1: Owners/Users (crm.objects.owners.read)")
     
+    # Both owner lists are independent; fetch them in one round-trip window
+    active, archived = await asyncio.gather(*(
+        make_request(session, "https://api.hubapi.com/crm/v3/owners/", params={"limit": 5, "archived": flag})
+        for flag in ("false", "true")
+    ))
+    
     print("\n📋 Active Owners:")
-    data = make_request("https://api.hubapi.com/crm/v3/owners/", params={"limit": 5, "archived": "false"})
-    if data:
-        print(f"  Total active owners: {data.get('results', [])}")
-        if data.get('results'):
-            print("\n  Sample owner:")
-            owner = data['results'][0]
-            print(f"    ID: {owner.get('id')}")
-            print(f"    Email: {owner.get('email')}")
-            print(f"    Name: {owner.get('firstName')} {owner.get('lastName')}")
-            print(f"    User ID: {owner.get('userId')}")
-            print(f"    Created: {owner.get('createdAt')}")
+    if active:
+        print(f"  Total active owners: {active.get('results', [])}")
+        if active.get('results'):
+            owner = active['results'][0]
+            sys.stdout.write(
+                "\n  Sample owner:\n"
+                f"    ID: {owner.get('id')}\n"
+                f"    Email: {owner.get('email')}\n"
+                f"    Name: {owner.get('firstName')} {owner.get('lastName')}\n"
+                f"    User ID: {owner.get('userId')}\n"
+                f"    Created: {owner.get('createdAt')}\n"
+            )
     
     print("\n📋 Archived/Deactivated Owners:")
-    data = make_request("https://api.hubapi.com/crm/v3/owners/", params={"limit": 5, "archived": "true"})
-    if data:
-        print(f"  Total archived owners: {len(data.get('results', []))}")
-        if data.get('results'):
-            print("\n  Sample archived owner:")
-            owner = data['results'][0]
-            print(f"    ID: {owner.get('id')}")
-            print(f"    Email: {owner.get('email')}")
+    if archived:
+        print(f"  Total archived owners: {len(archived.get('results', []))}")
+        if archived.get('results'):
+            owner = archived['results'][0]
+            sys.stdout.write(
+                "\n  Sample archived owner:\n"
+                f"    ID: {owner.get('id')}\n"
+                f"    Email: {owner.get('email')}\n"
+            )
 
 # =============================================================================
 # TEST 2: Login History (Enterprise Only)
 # =============================================================================
-def test_login_history():
+async def test_login_history(session):
     print_section("TEST 2: Login History (Enterprise Only)")
     
     print("\n🔐 Attempting to fetch login history...")
-    data = make_request("https://api.hubapi.com/account-info/v3/activity/login", params={"limit": 5})
+    data = await make_request(session, "https://api.hubapi.com/account-info/v3/activity/login", params={"limit": 5})
     if data:
         print(f"  ✅ Enterprise API available!")
         print(f"  Total login records: {len(data.get('results', []))}")
         if data.get('results'):
-            print("\n  Sample login record:")
             login = data['results'][0]
-            print(f"    User ID: {login.get('userId')}")
-            print(f"    Login Time: {login.get('loginAt')}")
-            print(f"    IP: {login.get('ipAddress', 'N/A')}")
+            sys.stdout.write(
+                "\n  Sample login record:\n"
+                f"    User ID: {login.get('userId')}\n"
+                f"    Login Time: {login.get('loginAt')}\n"
+                f"    IP: {login.get('ipAddress', 'N/A')}\n"
+            )
     else:
         print("  ℹ️  Enterprise login API not available (normal for Pro/Starter tiers)")
 
 # =============================================================================
 # TEST 3: Engagements (v1 API)
 # =============================================================================
-def test_engagements():
+async def test_engagements(session):
     print_section("TEST 3: Engagements - Calls, Emails, Meetings, Tasks")
     
     print("\n📞 Fetching recent engagements...")
-    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
-    cutoff_ts = int(cutoff.timestamp() * 1000)
     
-    data = make_request("https://api.hubapi.com/engagements/v1/engagements/paged", 
-                       params={"limit": 10})
+    # Engagement payloads carry bulky associations; stream-parse just the
+    # records we show instead of buffering the whole body.
+    data = await make_request(session, "https://api.hubapi.com/engagements/v1/engagements/paged", 
+                       params={"limit": 10}, max_items=10)
     if data:
         results = data.get('results', [])
         print(f"  Total engagements found: {len(results)}")
         
         if results:
-            print("\n  Sample engagement:")
             item = results[0]
             eng = item.get('engagement', {})
             assoc = item.get('associations', {})
             
-            print(f"    Type: {eng.get('type')}")
-            print(f"    Created: {datetime.fromtimestamp(eng.get('createdAt', 0)/1000)}")
-            print(f"    Owner ID: {eng.get('ownerId', 'None')}")
-            print(f"    Created By User ID: {eng.get('createdBy', 'None')}")
-            print(f"    Source ID: {eng.get('sourceId', 'None')}")
-            print(f"    Associations:")
-            print(f"      Contact IDs: {assoc.get('contactIds', [])}")
-            print(f"      Deal IDs: {assoc.get('dealIds', [])}")
-            print(f"      Owner IDs: {assoc.get('ownerIds', [])}")
+            sys.stdout.write(
+                "\n  Sample engagement:\n"
+                f"    Type: {eng.get('type')}\n"
+                f"    Created: {datetime.fromtimestamp(eng.get('createdAt', 0)/1000)}\n"
+                f"    Owner ID: {eng.get('ownerId', 'None')}\n"
+                f"    Created By User ID: {eng.get('createdBy', 'None')}\n"
+                f"    Source ID: {eng.get('sourceId', 'None')}\n"
+                "    Associations:\n"
+                f"      Contact IDs: {assoc.get('contactIds', [])}\n"
+                f"      Deal IDs: {assoc.get('dealIds', [])}\n"
+                f"      Owner IDs: {assoc.get('ownerIds', [])}\n"
+            )
         
         # Count by type
-        types = {}
-        for item in results:
-            eng_type = item.get('engagement', {}).get('type', 'unknown')
-            types[eng_type] = types.get(eng_type, 0) + 1
+        types = Counter(item.get('engagement', {}).get('type', 'unknown') for item in results)
         
         print(f"\n  Engagement breakdown:")
-        for eng_type, count in types.items():
+        for eng_type, count in types.most_common():
             print(f"    {eng_type}: {count}")
 
 # =============================================================================
-# TEST 4: CRM Objects - Contacts
+# TESTS 4-6: CRM Objects - Contacts, Deals, Tickets
 # =============================================================================
-def test_contacts():
-    print_section("TEST 4: CRM Contacts (crm.objects.contacts.read)")
-    
-    print("\n👤 Fetching recent contacts...")
-    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
-    cutoff_ts = int(cutoff.timestamp() * 1000)
-    
-    payload = {
-        "filterGroups": [{
-            "filters": [{
-                "propertyName": "hs_lastmodifieddate",
-                "operator": "GTE",
-                "value": str(cutoff_ts)
-            }]
-        }],
+# Per object type: section title, what to search for, and which properties
+# to show for the sample record as (label, property names, default).
+CRM_CONFIGS = {
+    "contacts": {
+        "title": "TEST 4: CRM Contacts (crm.objects.contacts.read)",
+        "icon": "👤",
+        "noun": "contact",
         "properties": ["firstname", "lastname", "email", "hubspot_owner_id", "hs_lastmodifieddate"],
-        "limit": 5
-    }
-    
-    data = make_request("https://api.hubapi.com/crm/v3/objects/contacts/search", 
-                       method="POST", json=payload)
-    if data:
-        results = data.get('results', [])
-        print(f"  Contacts modified in last 30 days: {len(results)}")
-        
-        if results:
-            print("\n  Sample contact:")
-            contact = results[0]
-            props = contact.get('properties', {})
-            print(f"    ID: {contact.get('id')}")
-            print(f"    Name: {props.get('firstname')} {props.get('lastname')}")
-            print(f"    Email: {props.get('email')}")
-            print(f"    Owner ID: {props.get('hubspot_owner_id', 'None')}")
-            print(f"    Last Modified: {props.get('hs_lastmodifieddate')}")
-
-# =============================================================================
-# TEST 5: CRM Objects - Deals
-# =============================================================================
-def test_deals():
-    print_section("TEST 5: CRM Deals (crm.objects.deals.read)")
-    
-    print("\n💼 Fetching recent deals...")
-    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
-    cutoff_ts = int(cutoff.timestamp() * 1000)
-    
-    payload = {
-        "filterGroups": [{
-            "filters": [{
-                "propertyName": "hs_lastmodifieddate",
-                "operator": "GTE",
-                "value": str(cutoff_ts)
-            }]
-        }],
+        "display": [
+            ("Name", ("firstname", "lastname"), None),
+            ("Email", ("email",), None),
+            ("Owner ID", ("hubspot_owner_id",), "None"),
+            ("Last Modified", ("hs_lastmodifieddate",), None),
+        ],
+    },
+    "deals": {
+        "title": "TEST 5: CRM Deals (crm.objects.deals.read)",
+        "icon": "💼",
+        "noun": "deal",
         "properties": ["dealname", "amount", "dealstage", "hubspot_owner_id", "hs_lastmodifieddate"],
-        "limit": 5
-    }
-    
-    data = make_request("https://api.hubapi.com/crm/v3/objects/deals/search", 
-                       method="POST", json=payload)
-    if data:
-        results = data.get('results', [])
-        print(f"  Deals modified in last 30 days: {len(results)}")
-        
-        if results:
-            print("\n  Sample deal:")
-            deal = results[0]
-            props = deal.get('properties', {})
-            print(f"    ID: {deal.get('id')}")
-            print(f"    Name: {props.get('dealname')}")
-            print(f"    Amount: {props.get('amount', 'N/A')}")
-            print(f"    Stage: {props.get('dealstage')}")
-            print(f"    Owner ID: {props.get('hubspot_owner_id', 'None')}")
-            print(f"    Last Modified: {props.get('hs_lastmodifieddate')}")
+        "display": [
+            ("Name", ("dealname",), None),
+            ("Amount", ("amount",), "N/A"),
+            ("Stage", ("dealstage",), None),
+            ("Owner ID", ("hubspot_owner_id",), "None"),
+            ("Last Modified", ("hs_lastmodifieddate",), None),
+        ],
+    },
+    "tickets": {
+        "title": "TEST 6: CRM Tickets (crm.objects.tickets.read)",
+        "icon": "🎫",
+        "noun": "ticket",
+        "properties": ["subject", "content", "hs_ticket_priority", "hubspot_owner_id", "hs_lastmodifieddate"],
+        "display": [
+            ("Subject", ("subject",), "N/A"),
+            ("Priority", ("hs_ticket_priority",), "N/A"),
+            ("Owner ID", ("hubspot_owner_id",), "None"),
+            ("Last Modified", ("hs_lastmodifieddate",), None),
+        ],
+    },
+}
 
-# =============================================================================
-# TEST 6: CRM Objects - Tickets
-# =============================================================================
-def test_tickets():
-    print_section("TEST 6: CRM Tickets (crm.objects.tickets.read)")
-    
-    print("\n🎫 Fetching recent tickets...")
-    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
-    cutoff_ts = int(cutoff.timestamp() * 1000)
-    
-    payload = {
+def _search_body_template(properties):
+    """Pre-serialize a search body, leaving %-placeholders for cutoff/limit/after."""
+    body = orjson.dumps({
         "filterGroups": [{
             "filters": [{
                 "propertyName": "hs_lastmodifieddate",
                 "operator": "GTE",
-                "value": str(cutoff_ts)
+                "value": "__CUTOFF__"
             }]
         }],
-        "properties": ["subject", "content", "hs_ticket_priority", "hubspot_owner_id", "hs_lastmodifieddate"],
-        "limit": 5
-    }
+        "properties": properties,
+        "limit": "__LIMIT__",
+        "after": "__AFTER__"
+    }).decode()
+    return (body.replace("%", "%%")
+            .replace('"__CUTOFF__"', '"%(cutoff)s"')
+            .replace('"__LIMIT__"', "%(limit)d")
+            .replace('"__AFTER__"', '"%(after)d"'))
+
+# Search bodies only differ by cutoff/limit/after, so serialize them once up front.
+SEARCH_BODY_TEMPLATES = {
+    obj_type: _search_body_template(config["properties"]) for obj_type, config in CRM_CONFIGS.items()
+}
+
+async def search_recent(session, obj_type, days=30, limit=5, after=0):
+    """Search for CRM objects modified in the last `days` days."""
+    body = SEARCH_BODY_TEMPLATES[obj_type] % {"cutoff": cutoff_ms(days), "limit": limit, "after": after}
+    return await make_request(session, f"https://api.hubapi.com/crm/v3/objects/{obj_type}/search",
+                              method="POST", data=body.encode())
+
+async def paginate_search(session, obj_type, days=30, page_size=100):
+    """Fetch every matching record, requesting all pages after the first at once.
+
+    Search `after` cursors are plain offsets, so once the first page reports
+    `total` the remaining pages can be fetched concurrently.
+    Returns None if the first page fails, and warns when the results are
+    incomplete (a later page failed, or the 10,000-result cap was hit).
+    """
+    first = await search_recent(session, obj_type, days, limit=page_size)
+    if not first:
+        return None
+    reported_total = first.get('total', 0)
+    total = min(reported_total, SEARCH_RESULT_CAP)
+    pages = await asyncio.gather(*(
+        search_recent(session, obj_type, days, limit=page_size, after=after)
+        for after in range(page_size, total, page_size)
+    ))
+    results = list(first.get('results', []))
+    failed = 0
+    for page in pages:
+        if page:
+            results.extend(page.get('results', []))
+        else:
+            failed += 1
+    if failed:
+        print(f"  ⚠️  {failed} of {len(pages) + 1} pages failed; the count below is partial")
+    if reported_total > SEARCH_RESULT_CAP:
+        print(f"  ⚠️  {reported_total} matches, but search stops at {SEARCH_RESULT_CAP}; the count below is partial")
+    return results
+
+async def test_crm_object(session, obj_type):
+    config = CRM_CONFIGS[obj_type]
+    print_section(config["title"])
     
-    data = make_request("https://api.hubapi.com/crm/v3/objects/tickets/search", 
-                       method="POST", json=payload)
-    if data:
-        results = data.get('results', [])
-        print(f"  Tickets modified in last 30 days: {len(results)}")
+    print(f"\n{config['icon']} Fetching recent {obj_type}...")
+    if FETCH_ALL_PAGES:
+        results = await paginate_search(session, obj_type)
+    else:
+        data = await search_recent(session, obj_type)
+        results = data.get('results', []) if data else None
+    if results is not None:
+        print(f"  {obj_type.capitalize()} modified in last 30 days: {len(results)}")
         
         if results:
-            print("\n  Sample ticket:")
-            ticket = results[0]
-            props = ticket.get('properties', {})
-            print(f"    ID: {ticket.get('id')}")
-            print(f"    Subject: {props.get('subject', 'N/A')}")
-            print(f"    Priority: {props.get('hs_ticket_priority', 'N/A')}")
-            print(f"    Owner ID: {props.get('hubspot_owner_id', 'None')}")
-            print(f"    Last Modified: {props.get('hs_lastmodifieddate')}")
+            record = results[0]
+            props = record.get('properties', {})
+            lines = [f"\n  Sample {config['noun']}:", f"    ID: {record.get('id')}"]
+            for label, fields, default in config["display"]:
+                lines.append(f"    {label}: {' '.join(str(props.get(f, default)) for f in fields)}")
+            sys.stdout.write("\n".join(lines) + "\n")
 
 # =============================================================================
 # TEST 7: Properties (understand what fields are available)
 # =============================================================================
-def test_properties():
+async def test_properties(session):
     print_section("TEST 7: Available Properties for Contacts")
     
     print("\n📋 Fetching contact properties...")
-    data = make_request("https://api.hubapi.com/crm/v3/properties/contacts", params={"limit": 10})
+    data = await make_request(session, "https://api.hubapi.com/crm/v3/properties/contacts", params={"limit": 10})
     if data:
         results = data.get('results', [])
         print(f"  Total properties available: {len(results)}")
         
-        print("\n  Sample properties (first 5):")
-        for prop in results[:5]:
-            print(f"    {prop.get('name')}: {prop.get('label')} ({prop.get('type')})")
+        lines = ["\n  Sample properties (first 5):"]
+        lines += [f"    {prop.get('name')}: {prop.get('label')} ({prop.get('type')})" for prop in results[:5]]
+        sys.stdout.write("\n".join(lines) + "\n")
 
 # =============================================================================
 # MAIN
 # =============================================================================
-def main():
-    print("\n" + "="*70)
-    print("  HUBSPOT API EXPLORER")
-    print("  Get acquainted with what data is available")
-    print("="*70)
+# Test name (for --only) -> test coroutine, in report order
+TESTS = {
+    "owners": test_owners,
+    "login": test_login_history,
+    "engagements": test_engagements,
+    **{obj_type: functools.partial(test_crm_object, obj_type=obj_type) for obj_type in CRM_CONFIGS},
+    "properties": test_properties,
+}
+
+def parse_test_names(value):
+    """argparse type for --only: a comma-separated list of test names."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if not names:
+        raise argparse.ArgumentTypeError(f"no test names given (choose from {', '.join(TESTS)})")
+    unknown = [name for name in names if name not in TESTS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown test(s): {', '.join(unknown)} (choose from {', '.join(TESTS)})")
+    return names
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Explore what the HubSpot API exposes for your account.")
+    parser.add_argument("--only", type=parse_test_names, default=list(TESTS), metavar="NAMES",
+                        help=f"comma-separated tests to run (default: all of {','.join(TESTS)})")
+    parser.add_argument("--sequential", action="store_true",
+                        help="run the tests one at a time instead of concurrently (easier on rate limits)")
+    return parser.parse_args()
+
+async def main(args):
+    sys.stdout = _TaskAwareStdout(sys.stdout)
+    with buffered_out():
+        print("\n" + "="*70)
+        print("  HUBSPOT API EXPLORER")
+        print("  Get acquainted with what data is available")
+        print("="*70)
     
-    # Run all tests
-    test_owners()
-    test_login_history()
-    test_engagements()
-    test_contacts()
-    test_deals()
-    test_tickets()
-    test_properties()
+    # Run all tests (concurrently unless --sequential); each one's output is
+    # written in a single write, in order, as soon as it and the tests before
+    # it have finished
+    tests = [TESTS[name] for name in TESTS if name in args.only]
+    async with create_session() as session:
+        if args.sequential:
+            runs = (run_captured(test, session) for test in tests)
+        else:
+            runs = [asyncio.create_task(run_captured(test, session)) for test in tests]
+        for run in runs:
+            sys.stdout.write(await run)
+            sys.stdout.flush()
     
-    print_section("✅ API Exploration Complete")
-    print("\n💡 Key Takeaways:")
-    print("  - Owners API: Shows all users (active + archived)")
-    print("  - Engagements API: Tracks calls, emails, meetings, tasks")
-    print("  - CRM Objects: Can filter by date and owner_id")
-    print("  - Login History: Enterprise only (shows actual login activity)")
-    print("  - Properties API: Shows what fields you can query/filter by")
-    print("\n📚 Next Steps:")
-    print("  - Review the output above to see what data you have")
-    print("  - Check which APIs returned 403 (missing scopes)")
-    print("  - Use this understanding to improve your audit tool")
-    print()
+    with buffered_out():
+        print_section("✅ API Exploration Complete")
+        print("\n💡 Key Takeaways:")
+        print("  - Owners API: Shows all users (active + archived)")
+        print("  - Engagements API: Tracks calls, emails, meetings, tasks")
+        print("  - CRM Objects: Can filter by date and owner_id")
+        print("  - Login History: Enterprise only (shows actual login activity)")
+        print("  - Properties API: Shows what fields you can query/filter by")
+        print("\n📚 Next Steps:")
+        print("  - Review the output above to see what data you have")
+        print("  - Check which APIs returned 403 (missing scopes)")
+        print("  - Use this understanding to improve your audit tool")
+        print()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main(parse_args()))
\ No newline at end of file
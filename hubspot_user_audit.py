@@ -5,12 +5,21 @@ Combines engagement tracking with CRM activity for maximum accuracy.
 Outputs both console report and CSV file.
 """
 
-import requests
+import asyncio
+import csv
+import hashlib
 import os
+import pickle
 import sys
-import csv
+import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict
+
+import aiohttp
+import orjson
+from aiolimiter import AsyncLimiter
+
+from _engagements_hot import process_batch, summarize
 
 # --- CONFIGURATION ---
 TOKEN = os.getenv("HUBSPOT_API_KEY")
@@ -23,36 +32,145 @@ ENGAGEMENT_WINDOW_DAYS = 60
 CRM_ACTIVITY_WINDOW_DAYS = 30
 LOGIN_INACTIVE_DAYS = 90
 SEAT_COST = 75
+CRM_OBJECT_TYPES = ['contacts', 'deals', 'tickets']
+MS_PER_DAY = 86_400_000
+# The recent/modified engagements endpoint only covers the last 30 days and
+# at most 10k records; outside that, scan everything via /paged.
+ALL_ENGAGEMENTS_URL = "https://api.hubapi.com/engagements/v1/engagements/paged"
+RECENT_ENGAGEMENTS_URL = "https://api.hubapi.com/engagements/v1/engagements/recent/modified"
+RECENT_ENGAGEMENTS_MAX_DAYS = 30
+RECENT_ENGAGEMENTS_CAP = 10000
+SEARCH_PAGE_SIZE = 200      # CRM search maximum
+SEARCH_RESULT_CAP = 10000   # CRM search won't page past this many results
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MS = timedelta(milliseconds=1)
+
+# Incremental state: each run saves the engagements and CRM modifications it
+# attributed, so the next run only fetches what changed since then and the
+# rest is re-totalled locally. One file per portal, keyed by a hash of the
+# token. Set SEATSCOUT_NOCACHE=1 to force a full rescan.
+STATE_DIR = ".seatscout_cache"
+STATE_ENABLED = not os.getenv("SEATSCOUT_NOCACHE")
+STATE_VERSION = 1
+STATE_OVERLAP_MS = 10 * 60 * 1000   # re-fetch this far before the last run, for late-indexed records
 
 HEADERS = {
     "Authorization": f"Bearer {TOKEN}",
     "Content-Type": "application/json"
 }
 
-def make_request(url, method="GET", **kwargs):
-    """Make API request with error handling."""
+# HubSpot private apps get 100 requests per 10 seconds. Cap in-flight
+# requests and pace them under that limit so concurrent scans don't stall
+# on 429s.
+MAX_CONCURRENT_REQUESTS = 8
+_request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+_rate_limiter = AsyncLimiter(100, 10)
+# CRM search has its own, much lower limit (4 requests per second), shared
+# by every object type's search. A capacity of one spaces searches a
+# quarter second apart instead of allowing an initial burst.
+_search_rate_limiter = AsyncLimiter(1, 0.25)
+
+# Rate limits, transient server errors and network failures are retried
+# with exponential backoff (1s, 2s, 4s, ... capped), honoring Retry-After.
+# Giving up silently would truncate pagination and under-count activity.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_MIN = 1
+BACKOFF_MAX = 30
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (0-based)."""
     try:
-        if method == "GET":
-            resp = requests.get(url, headers=HEADERS, timeout=10, **kwargs)
-        elif method == "POST":
-            resp = requests.post(url, headers=HEADERS, timeout=10, **kwargs)
-        
-        if resp.status_code == 403:
+        return min(float(retry_after), BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return min(BACKOFF_MIN * 2 ** attempt, BACKOFF_MAX)
+
+async def make_request(session, url, method="GET", **kwargs):
+    """Make API request with error handling, rate limiting and retries."""
+    for attempt in range(MAX_RETRIES + 1):
+        last_try = attempt == MAX_RETRIES
+        # Wait for a search slot before taking a request slot, so queued
+        # searches don't hold up other requests
+        search_limit = _search_rate_limiter if url.endswith('/search') else nullcontext()
+        try:
+            async with search_limit, _request_slots, _rate_limiter:
+                async with session.request(method, url, **kwargs) as resp:
+                    if resp.status in RETRY_STATUSES and not last_try:
+                        delay = retry_delay(attempt, resp.headers.get('Retry-After'))
+                    elif resp.status == 403:
+                        return None
+                    else:
+                        resp.raise_for_status()
+                        return orjson.loads(await resp.read())
+        except aiohttp.ClientResponseError:
+            # Non-retryable HTTP error (or retries exhausted)
+            return None
+        except orjson.JSONDecodeError:
             return None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if last_try:
+                return None
+            delay = retry_delay(attempt)
         
-        resp.raise_for_status()
-        return resp.json()
-    except requests.exceptions.RequestException:
-        return None
+        # Sleep outside the semaphore so other requests can proceed
+        await asyncio.sleep(delay)
+
+# HubSpot timestamps look like '2024-01-15T10:20:30.123Z'. Python 3.11+'s
+# (C-implemented) fromisoformat accepts the trailing 'Z' itself, so skip the
+# per-call str.replace there.
+if sys.version_info >= (3, 11):
+    parse_iso_utc = datetime.fromisoformat
+else:
+    def parse_iso_utc(value):
+        """Parse a HubSpot UTC timestamp."""
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def state_path():
+    """Path of this portal's saved scan state."""
+    key = hashlib.sha1(TOKEN.encode()).hexdigest()
+    return os.path.join(STATE_DIR, f"{key}.pickle")
+
+def load_state():
+    """Return the previous run's scan state, or {} if there is none."""
+    if not STATE_ENABLED:
+        return {}
+    try:
+        with open(state_path(), 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, EOFError, AttributeError, ValueError, pickle.UnpicklingError):
+        return {}
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return {}
+    return state
 
-def get_all_owners(archived=False):
+def save_state(state):
+    """Persist scan state for the next run."""
+    if not STATE_ENABLED:
+        return
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = state_path()
+    with open(f"{path}.tmp", "wb") as f:
+        pickle.dump({**state, 'version': STATE_VERSION}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{path}.tmp", path)
+
+def resume_scan(saved, cutoff_ts):
+    """
+    Pick up a saved scan: returns (records, since_ts), where only records
+    changed at or after since_ts need fetching. Starts over (no records,
+    since the window cutoff) when there's no usable saved scan.
+    """
+    if saved and saved['cutoff_ts'] <= cutoff_ts:
+        return saved['records'], max(cutoff_ts, saved['fetched_at'] - STATE_OVERLAP_MS)
+    return {}, cutoff_ts
+
+async def get_all_owners(session, archived=False):
     """Fetch all owners/users from HubSpot."""
     owners = []
     url = "https://api.hubapi.com/crm/v3/owners/"
     params = {"limit": 100, "archived": str(archived).lower()}
     
     while url:
-        data = make_request(url, params=params)
+        data = await make_request(session, url, params=params)
         if not data:
             break
         owners.extend(data.get('results', []))
@@ -64,20 +182,20 @@ def get_all_owners(archived=False):
     
     return owners
 
-def check_enterprise_login_history():
+async def check_enterprise_login_history(session):
     """Get login history (Enterprise only)."""
     user_logins = {}
     url = "https://api.hubapi.com/account-info/v3/activity/login"
     params = {"limit": 100}
     
     while url:
-        data = make_request(url, params=params)
+        data = await make_request(session, url, params=params)
         if not data:
             return {}
         
         for login in data.get('results', []):
             user_id = str(login.get('userId'))
-            login_ts = datetime.fromisoformat(login['loginAt'].replace('Z', '+00:00'))
+            login_ts = parse_iso_utc(login['loginAt'])
             
             if user_id not in user_logins or login_ts > user_logins[user_id]:
                 user_logins[user_id] = login_ts
@@ -90,36 +208,37 @@ def check_enterprise_login_history():
     
     return user_logins
 
-def get_engagement_activity(days=60):
+async def get_engagement_activity(session, days, owners, state):
     """
     Get engagement activity using v1 Engagements API.
-    Returns (activity_map, unattributed_count)
+    `owners` (active and archived) supplies the userId -> ownerId mapping.
+    Continues from the scan saved in `state` when there is one, and stores
+    the updated scan back into it.
+    Returns (activity_map, unattributed_by_type, scan_stats)
     """
-    activity_map = defaultdict(lambda: {'count': 0, 'last_date': None, 'types': set()})
-    unattributed_count = 0
-    
     # Build userId -> ownerId mapping
-    user_to_owner = {}
-    owners_data = make_request("https://api.hubapi.com/crm/v3/owners/", 
-                               params={"limit": 100, "archived": "false"})
-    if owners_data:
-        for owner in owners_data.get('results', []):
-            user_id = owner.get('userId')
-            owner_id = str(owner.get('id'))
-            if user_id:
-                user_to_owner[user_id] = owner_id
-    
-    cutoff_dt = datetime.now(timezone.utc) - timedelta(days=days)
-    cutoff_ts = int(cutoff_dt.timestamp() * 1000)
-    
-    print(f"   - Scanning all engagements (v1 API)...")
-    
-    url = "https://api.hubapi.com/engagements/v1/engagements/paged"
-    params = {"limit": 250}
-    
-    total_scanned = 0
-    attributed = 0
+    user_to_owner = {o['userId']: str(o.get('id')) for o in owners if o.get('userId')}
+    
+    started_ts = int(time.time() * 1000)
+    cutoff_ts = started_ts - days * MS_PER_DAY
+    
+    # engagement id -> (owner id or None, createdAt ms, type)
+    records, since_ts = resume_scan(state.get('engagements'), cutoff_ts)
+    resumed = since_ts > cutoff_ts
+    
+    if started_ts - since_ts <= RECENT_ENGAGEMENTS_MAX_DAYS * MS_PER_DAY:
+        # Let the server filter to engagements modified since then (a
+        # superset of those created since then) instead of walking all history
+        url = RECENT_ENGAGEMENTS_URL
+        params = {"count": 100, "since": since_ts}
+    else:
+        url = ALL_ENGAGEMENTS_URL
+        params = {"limit": 250}
+        records = {}
+    
+    total_fetched = 0
     sample_engagements = 0
+    complete = True
     
     has_more = True
     offset = 0
@@ -128,60 +247,19 @@ def get_engagement_activity(days=60):
         if offset > 0:
             params['offset'] = offset
         
-        data = make_request(url, params=params)
+        data = await make_request(session, url, params=params)
         if not data:
+            complete = False
             break
         
-        results = data.get('results', [])
+        if url == RECENT_ENGAGEMENTS_URL and offset == 0 and data.get('total', 0) > RECENT_ENGAGEMENTS_CAP:
+            # Too many to list via the recent endpoint; fall back to a full scan
+            url, params, records = ALL_ENGAGEMENTS_URL, {"limit": 250}, {}
+            continue
         
-        for item in results:
-            engagement = item.get('engagement', {})
-            associations = item.get('associations', {})
-            
-            created_ts = engagement.get('createdAt')
-            engagement_type = engagement.get('type')
-            source_id = engagement.get('sourceId', '')
-            
-            # Skip sample/demo data
-            if 'SAMPLE' in source_id.upper():
-                sample_engagements += 1
-                continue
-            
-            if not created_ts or created_ts < cutoff_ts:
-                continue
-            
-            total_scanned += 1
-            dt = datetime.fromtimestamp(created_ts / 1000, tz=timezone.utc)
-            
-            # Try multiple attribution methods
-            attributed_owner = None
-            
-            # Method 1: Check ownerId in engagement
-            if engagement.get('ownerId'):
-                attributed_owner = str(engagement['ownerId'])
-            
-            # Method 2: Check createdBy
-            elif engagement.get('createdBy') and engagement['createdBy'] in user_to_owner:
-                attributed_owner = user_to_owner[engagement['createdBy']]
-            
-            # Method 3: Check modifiedBy as fallback
-            elif engagement.get('modifiedBy') and engagement['modifiedBy'] in user_to_owner:
-                attributed_owner = user_to_owner[engagement['modifiedBy']]
-            
-            # Method 4: Check associations ownerIds
-            elif associations.get('ownerIds'):
-                attributed_owner = str(associations['ownerIds'][0])
-            
-            if attributed_owner:
-                activity_map[attributed_owner]['count'] += 1
-                activity_map[attributed_owner]['types'].add(engagement_type.lower() if engagement_type else 'unknown')
-                
-                if not activity_map[attributed_owner]['last_date'] or dt > activity_map[attributed_owner]['last_date']:
-                    activity_map[attributed_owner]['last_date'] = dt
-                
-                attributed += 1
-            else:
-                unattributed_count += 1
+        fetched, samples = process_batch(data.get('results', []), cutoff_ts, user_to_owner, records)
+        total_fetched += fetched
+        sample_engagements += samples
         
         # Check if there's more data
         if data.get('hasMore'):
@@ -189,94 +267,219 @@ def get_engagement_activity(days=60):
         else:
             has_more = False
     
-    if sample_engagements > 0:
-        print(f"      ℹ️  Skipped {sample_engagements} sample/demo engagements")
+    # owner id -> {'count', 'last_ts', 'types'}; last_ts stays in epoch ms
+    # (as the API returns it)
+    activity_map, attributed, unattributed_count = summarize(records, cutoff_ts)
     
-    print(f"      ✓ Scanned: {total_scanned}, Attributed: {attributed}, Unattributed: {unattributed_count}")
+    if complete:
+        state['engagements'] = {'cutoff_ts': cutoff_ts, 'fetched_at': started_ts, 'records': records}
     
-    return activity_map, {'engagements': unattributed_count}
+    scan_stats = {
+        'scanned': attributed + unattributed_count,
+        'attributed': attributed,
+        'samples': sample_engagements,
+        'fetched': total_fetched if resumed and url == RECENT_ENGAGEMENTS_URL else None,
+    }
+    return activity_map, {'engagements': unattributed_count}, scan_stats
+
+async def get_crm_activity(session, days, state):
+    """
+    Get CRM object modification activity.
+    Continues from the scan saved in `state` when there is one, and stores
+    the updated scan back into it.
+    """
+    started_ts = int(time.time() * 1000)
+    cutoff_ts = started_ts - days * MS_PER_DAY
+    
+    # (object type, record id) -> (owner id or None, hs_lastmodifieddate ms)
+    records, since_ts = resume_scan(state.get('crm'), cutoff_ts)
+    
+    # Bulk edits and workflows stamp many records with the same
+    # hs_lastmodifieddate, so parse each distinct string only once
+    ts_cache = {}
+    
+    # Object types are independent searches, so scan them concurrently
+    complete = all(await asyncio.gather(*(
+        scan_crm_object(session, obj_type, since_ts, records, ts_cache)
+        for obj_type in CRM_OBJECT_TYPES
+    )))
+    
+    # Total per owner, dropping records that have aged out of the window
+    last_ts = {}
+    activity_map = {}
+    expired = []
+    for key, (owner_id, record_ts) in records.items():
+        if record_ts < cutoff_ts:
+            expired.append(key)
+        elif owner_id:
+            entry = activity_map.get(owner_id)
+            if entry is None:
+                entry = activity_map[owner_id] = {'count': 0, 'last_date': None}
+            entry['count'] += 1
+            if record_ts > last_ts.get(owner_id, 0):
+                last_ts[owner_id] = record_ts
+    for key in expired:
+        del records[key]
+    for owner_id, record_ts in last_ts.items():
+        activity_map[owner_id]['last_date'] = EPOCH + record_ts * ONE_MS
+    
+    if complete:
+        state['crm'] = {'cutoff_ts': cutoff_ts, 'fetched_at': started_ts, 'records': records}
+    
+    return activity_map
 
-def get_crm_activity(days=30):
-    """Get CRM object modification activity."""
-    activity_map = defaultdict(lambda: {'count': 0, 'last_date': None})
+def modified_filter(operator, ts):
+    """Search filter on a record's last modification time (epoch ms)."""
+    return {"propertyName": "hs_lastmodifieddate", "operator": operator, "value": str(ts)}
+
+def crm_search_payload(filters, limit=SEARCH_PAGE_SIZE):
+    """Newest-modified-first CRM search for owner and modification time."""
+    return {
+        "filterGroups": [{"filters": filters}],
+        "sorts": [{"propertyName": "hs_lastmodifieddate", "direction": "DESCENDING"}],
+        "properties": ["hubspot_owner_id", "hs_lastmodifieddate"],
+        "limit": limit
+    }
+
+async def estimate_crm_scan_pages(session, days, state):
+    """
+    Number of search pages get_crm_activity would fetch, from one
+    single-result search per object type. None if a count failed.
+    """
+    cutoff_ts = int(time.time() * 1000) - days * MS_PER_DAY
+    _, since_ts = resume_scan(state.get('crm'), cutoff_ts)
+    payload = crm_search_payload([modified_filter("GTE", since_ts)], limit=1)
+    
+    counts = await asyncio.gather(*(
+        make_request(session, f"https://api.hubapi.com/crm/v3/objects/{obj_type}/search",
+                     method="POST", json=payload)
+        for obj_type in CRM_OBJECT_TYPES
+    ))
+    if not all(counts):
+        return None
+    return sum(-(-data.get('total', 0) // SEARCH_PAGE_SIZE) for data in counts)
+
+def crm_probe_cost(n_owners):
+    """Searches spent probing n_owners, counting the scan-size estimate."""
+    return (n_owners + 1) * len(CRM_OBJECT_TYPES)
+
+async def probe_crm_activity(session, owner_ids, days):
+    """
+    CRM modification activity for just `owner_ids`: one single-result
+    search per owner and object type, taking the count from the search
+    total and the latest modification from the one (newest) result.
+    Returns None if any probe failed.
+    """
+    cutoff_ts = int(time.time() * 1000) - days * MS_PER_DAY
+    
+    async def probe(owner_id, obj_type):
+        payload = crm_search_payload([
+            modified_filter("GTE", cutoff_ts),
+            {"propertyName": "hubspot_owner_id", "operator": "EQ", "value": owner_id},
+        ], limit=1)
+        return await make_request(
+            session, f"https://api.hubapi.com/crm/v3/objects/{obj_type}/search",
+            method="POST", json=payload
+        )
     
-    cutoff_dt = datetime.now(timezone.utc) - timedelta(days=days)
-    cutoff_ts = int(cutoff_dt.timestamp() * 1000)
+    pairs = [(owner_id, obj_type) for owner_id in owner_ids for obj_type in CRM_OBJECT_TYPES]
+    responses = await asyncio.gather(*(probe(owner_id, obj_type) for owner_id, obj_type in pairs))
+    if not all(responses):
+        return None
     
-    object_types = ['contacts', 'deals', 'tickets']
+    activity_map = {}
+    for (owner_id, _), data in zip(pairs, responses):
+        results = data.get('results', [])
+        if not data.get('total') or not results:
+            continue
+        modified_date = results[0]['properties'].get('hs_lastmodifieddate')
+        entry = activity_map.setdefault(owner_id, {'count': 0, 'last_date': None})
+        entry['count'] += data['total']
+        if modified_date:
+            dt = parse_iso_utc(modified_date)
+            if not entry['last_date'] or dt > entry['last_date']:
+                entry['last_date'] = dt
     
-    for obj_type in object_types:
-        print(f"   - Scanning {obj_type}...")
-        url = f"https://api.hubapi.com/crm/v3/objects/{obj_type}/search"
+    return activity_map
+
+async def scan_crm_object(session, obj_type, since_ts, records, ts_cache):
+    """
+    Page through one object type's modifications since since_ts into
+    `records`. Returns False if the scan is incomplete: a request failed, or
+    more records share one modification time than a search can return.
+    HubSpot search stops at 10,000 results per query, so results are sorted
+    newest-first and, when the cap is reached, the search is re-run bounded
+    above by the oldest modification time seen so far. Records are keyed by
+    id, so ones seen again at that boundary are simply overwritten.
+    """
+    url = f"https://api.hubapi.com/crm/v3/objects/{obj_type}/search"
+    
+    upper_ts = None         # LTE bound once re-seeded past the result cap
+    oldest_ts = None
+    after = 0
+    
+    while True:
+        filters = [modified_filter("GTE", since_ts)]
+        if upper_ts is not None:
+            filters.append(modified_filter("LTE", upper_ts))
         
-        payload = {
-            "filterGroups": [{
-                "filters": [{
-                    "propertyName": "hs_lastmodifieddate",
-                    "operator": "GTE",
-                    "value": str(cutoff_ts)
-                }]
-            }],
-            "properties": ["hubspot_owner_id", "hs_lastmodifieddate"],
-            "limit": 100
-        }
+        payload = crm_search_payload(filters)
+        if after > 0:
+            payload['after'] = after
         
-        has_more = True
-        after = 0
+        data = await make_request(session, url, method="POST", json=payload)
+        if not data:
+            return False
         
-        while has_more:
-            if after > 0:
-                payload['after'] = after
+        for item in data.get('results', []):
+            owner_id = item['properties'].get('hubspot_owner_id')
+            modified_date = item['properties'].get('hs_lastmodifieddate')
+            if not modified_date:
+                continue
             
-            data = make_request(url, method="POST", json=payload)
-            if not data:
-                break
+            dt = ts_cache.get(modified_date)
+            if dt is None:
+                dt = ts_cache[modified_date] = parse_iso_utc(modified_date)
             
-            for item in data.get('results', []):
-                owner_id = item['properties'].get('hubspot_owner_id')
-                modified_date = item['properties'].get('hs_lastmodifieddate')
-                
-                if owner_id and modified_date:
-                    dt = datetime.fromisoformat(modified_date.replace('Z', '+00:00'))
-                    
-                    activity_map[owner_id]['count'] += 1
-                    
-                    if not activity_map[owner_id]['last_date'] or dt > activity_map[owner_id]['last_date']:
-                        activity_map[owner_id]['last_date'] = dt
+            record_ts = (dt - EPOCH) // ONE_MS
+            if oldest_ts is None or record_ts < oldest_ts:
+                oldest_ts = record_ts
             
-            if 'paging' in data and 'next' in data['paging']:
-                after = int(data['paging']['next']['after'])
-            else:
-                has_more = False
-    
-    return activity_map
+            # Unowned records are kept too, so a record whose owner was
+            # cleared replaces its earlier, owned copy
+            records[(obj_type, item['id'])] = (owner_id or None, record_ts)
+        
+        if 'paging' not in data or 'next' not in data['paging']:
+            return True
+        after = int(data['paging']['next']['after'])
+        
+        if after + SEARCH_PAGE_SIZE > SEARCH_RESULT_CAP:
+            if oldest_ts == upper_ts:
+                # A whole capped window shares one timestamp; can't narrow
+                # further, so the rest of it can't be fetched
+                print(f"   ⚠️  Over {SEARCH_RESULT_CAP} {obj_type} share one modification "
+                      f"time; CRM activity is partial")
+                return False
+            upper_ts = oldest_ts
+            after = 0
 
-def calculate_confidence(owner, login_history, engagement_activity, crm_activity, is_deactivated=False):
-    """Calculate confidence score for removing this user."""
-    owner_id = str(owner.get('id'))
-    user_id = str(owner.get('userId', ''))
-    
-    if is_deactivated:
-        # 100% confidence this user is deactivated
-        # High probability (~90%) they still have a paid seat due to HubSpot's manual removal process
-        # Users should verify in Settings -> Users & Teams -> Seats
-        return (100, 'DEACTIVATED', 'Account deactivated - check if seat still assigned')
-    
-    last_login = login_history.get(user_id)
-    eng_data = engagement_activity.get(owner_id)
-    crm_data = crm_activity.get(owner_id)
+def score_without_crm(owner, login_history, engagement_activity, now):
+    """
+    Score an active owner from login history and engagements alone.
+    Returns (confidence, category, reason), or None when neither decides
+    it and the score depends on CRM activity.
+    """
+    last_login = login_history.get(str(owner.get('userId', '')))
+    eng_data = engagement_activity.get(str(owner.get('id')))
     
     days_since_login = None
     if last_login:
-        days_since_login = (datetime.now(timezone.utc) - last_login).days
+        days_since_login = (now - last_login).days
     
     days_since_engagement = None
-    if eng_data and eng_data['last_date']:
-        days_since_engagement = (datetime.now(timezone.utc) - eng_data['last_date']).days
-    
-    days_since_crm = None
-    if crm_data and crm_data['last_date']:
-        days_since_crm = (datetime.now(timezone.utc) - crm_data['last_date']).days
+    if eng_data and eng_data['last_ts']:
+        now_ms = int(now.timestamp() * 1000)
+        days_since_engagement = (now_ms - eng_data['last_ts']) // MS_PER_DAY
     
     # HIGH CONFIDENCE (95%): No login in 90+ days
     if days_since_login is not None and days_since_login >= LOGIN_INACTIVE_DAYS:
@@ -285,71 +488,162 @@ def calculate_confidence(owner, login_history, engagement_activity, crm_activity
             details += ", no engagements detected"
         return (95, 'HIGH', details)
     
-    # MEDIUM-HIGH (80%): No engagements + no CRM
-    if (days_since_engagement is None or days_since_engagement >= ENGAGEMENT_WINDOW_DAYS):
-        if days_since_crm is None or days_since_crm >= CRM_ACTIVITY_WINDOW_DAYS:
-            return (80, 'MEDIUM-HIGH', f'No engagements in {ENGAGEMENT_WINDOW_DAYS}+ days, no CRM activity in {CRM_ACTIVITY_WINDOW_DAYS}+ days')
-        else:
-            return (70, 'MEDIUM', f'No engagements in {ENGAGEMENT_WINDOW_DAYS}+ days, but {crm_data["count"]} CRM modifications')
+    # No recent engagements: CRM activity decides
+    if days_since_engagement is None or days_since_engagement >= ENGAGEMENT_WINDOW_DAYS:
+        return None
     
     # ACTIVE
-    engagement_types = ', '.join(eng_data['types']) if eng_data else 'none'
-    return (0, 'ACTIVE', f'{eng_data["count"] if eng_data else 0} engagements ({engagement_types})')
+    engagement_types = ', '.join(eng_data['types'])
+    return (0, 'ACTIVE', f'{eng_data["count"]} engagements ({engagement_types})')
+
+def calculate_confidence(owner, login_history, engagement_activity, crm_activity, is_deactivated=False, now=None):
+    """Calculate confidence score for removing this user.
+    
+    `now` lets callers scoring many users share one clock reading.
+    """
+    if is_deactivated:
+        # 100% confidence this user is deactivated
+        # High probability (~90%) they still have a paid seat due to HubSpot's manual removal process
+        # Users should verify in Settings -> Users & Teams -> Seats
+        return (100, 'DEACTIVATED', 'Account deactivated - check if seat still assigned')
+    
+    if now is None:
+        now = datetime.now(timezone.utc)
+    
+    score = score_without_crm(owner, login_history, engagement_activity, now)
+    if score:
+        return score
+    
+    crm_data = crm_activity.get(str(owner.get('id')))
+    days_since_crm = None
+    if crm_data and crm_data['last_date']:
+        days_since_crm = (now - crm_data['last_date']).days
+    
+    # MEDIUM-HIGH (80%): No engagements + no CRM
+    if days_since_crm is None or days_since_crm >= CRM_ACTIVITY_WINDOW_DAYS:
+        return (80, 'MEDIUM-HIGH', f'No engagements in {ENGAGEMENT_WINDOW_DAYS}+ days, no CRM activity in {CRM_ACTIVITY_WINDOW_DAYS}+ days')
+    return (70, 'MEDIUM', f'No engagements in {ENGAGEMENT_WINDOW_DAYS}+ days, but {crm_data["count"]} CRM modifications')
+
+# Every flagged user costs one SEAT_COST seat and everyone else nothing, so
+# the report's cost columns only ever hold these strings
+MONTHLY_STR = f"${SEAT_COST}"
+ANNUAL_STR = f"${SEAT_COST * 12}"
+ZERO_STR = "$0"
 
 def write_csv_report(results, filename='seatscout_report.csv'):
     """Write results to CSV file."""
-    with open(filename, 'w', newline='') as csvfile:
-        fieldnames = [
-            'Name', 'Email', 'Status', 'Confidence', 'Category',
-            'Reason', 'Monthly Cost', 'Annual Cost'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for r in results:
-            writer.writerow({
-                'Name': r['name'],
-                'Email': r['email'],
-                'Status': r['status'],
-                'Confidence': f"{r['confidence']}%",
-                'Category': r['category'],
-                'Reason': r['reason'],
-                'Monthly Cost': f"${r['monthly_cost']}",
-                'Annual Cost': f"${r['annual_cost']}"
-            })
-    
+    fieldnames = [
+        'Name', 'Email', 'Status', 'Confidence', 'Category',
+        'Reason', 'Monthly Cost', 'Annual Cost'
+    ]
+    rows = [
+        (
+            r['name'], r['email'], r['status'], f"{r['confidence']}%",
+            r['category'], r['reason'],
+            *((MONTHLY_STR, ANNUAL_STR) if r['monthly_cost'] else (ZERO_STR, ZERO_STR))
+        )
+        for r in results
+    ]
+
+    with open(filename, 'w', newline='', buffering=1 << 16) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(fieldnames)
+        writer.writerows(rows)
+
     print(f"\n📄 Report saved to: {filename}")
 
-def main():
+async def main():
     print("\n" + "="*70)
     print("SEATSCOUT V3 - HUBSPOT SEAT AUDIT")
     print("="*70 + "\n")
     
-    # Get users
-    print("📊 Fetching user data...")
-    active_owners = get_all_owners(archived=False)
-    archived_owners = get_all_owners(archived=True)
+    print("📡 Fetching users, login history, engagements and CRM activity...\n")
+    timeout = aiohttp.ClientTimeout(total=10)
+    # Pool exactly as many keep-alive connections as requests may be in
+    # flight, so every page after the first few reuses an open TLS connection
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENT_REQUESTS, keepalive_timeout=30)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout, connector=connector) as session:
+        # Login history doesn't depend on the owner list, so it runs while
+        # owners load; the engagement scan needs the owners
+        state = load_state()
+        login_task = asyncio.create_task(check_enterprise_login_history(session))
+        crm_pages_task = asyncio.create_task(
+            estimate_crm_scan_pages(session, CRM_ACTIVITY_WINDOW_DAYS, state)
+        )
+        active_owners, archived_owners = await asyncio.gather(
+            get_all_owners(session, archived=False),
+            get_all_owners(session, archived=True),
+        )
+        engagement_task = asyncio.create_task(get_engagement_activity(
+            session, ENGAGEMENT_WINDOW_DAYS, active_owners + archived_owners, state
+        ))
+        
+        # CRM activity only affects users that login history doesn't flag
+        # and that have no recent engagements. Probing each of those costs
+        # one search per object type, on top of the estimate's searches;
+        # when even probing every user would cost more than scanning all
+        # modified records, scan alongside the engagements right away,
+        # otherwise decide once candidates are known.
+        crm_pages = await crm_pages_task
+        scored_owners = [o for o in active_owners if o.get('email')]
+        crm_task = None
+        if crm_pages is None or crm_pages <= crm_probe_cost(len(scored_owners)):
+            crm_task = asyncio.create_task(get_crm_activity(session, CRM_ACTIVITY_WINDOW_DAYS, state))
+        
+        (engagement_activity, unattributed_by_type, engagement_stats) = await engagement_task
+        total_engagements = sum(v['count'] for v in engagement_activity.values())
+        login_history = await login_task
+        
+        # One clock reading for picking CRM candidates and for scoring, so
+        # a user can't age out of the engagement window in between
+        now = datetime.now(timezone.utc)
+        crm_probed_users = None
+        if crm_task:
+            crm_activity = await crm_task
+        else:
+            candidates = [
+                str(o.get('id')) for o in scored_owners
+                if score_without_crm(o, login_history, engagement_activity, now) is None
+            ]
+            crm_activity = None
+            if crm_probe_cost(len(candidates)) < crm_pages:
+                crm_activity = await probe_crm_activity(session, candidates, CRM_ACTIVITY_WINDOW_DAYS)
+            if crm_activity is None:
+                crm_activity = await get_crm_activity(session, CRM_ACTIVITY_WINDOW_DAYS, state)
+            else:
+                crm_probed_users = len(candidates)
+    save_state(state)
+    
+    print("📊 Users:")
     print(f"   ✅ Found {len(active_owners)} active users")
     print(f"   ✅ Found {len(archived_owners)} deactivated users\n")
     
-    # Check Enterprise
-    print("🔐 Checking Enterprise login history...")
-    login_history = check_enterprise_login_history()
+    print("🔐 Enterprise login history:")
     has_enterprise = bool(login_history)
     if has_enterprise:
         print(f"   ✅ Enterprise API available ({len(login_history)} login records)\n")
     else:
         print("   ℹ️  Enterprise login API not available\n")
     
-    # Get engagement activity
-    print(f"📞 Scanning engagement activity (last {ENGAGEMENT_WINDOW_DAYS} days)...")
-    engagement_activity, unattributed_by_type = get_engagement_activity(ENGAGEMENT_WINDOW_DAYS)
-    print()
-    
-    # Get CRM activity
-    print(f"📋 Scanning CRM modifications (last {CRM_ACTIVITY_WINDOW_DAYS} days)...")
-    crm_activity = get_crm_activity(CRM_ACTIVITY_WINDOW_DAYS)
-    print()
+    print(f"📞 Engagement activity (last {ENGAGEMENT_WINDOW_DAYS} days, v1 API):")
+    if engagement_stats['fetched'] is not None:
+        # Resumed: samples were only counted in this run's fetch, while the
+        # totals below cover the whole saved window
+        skipped = engagement_stats['samples']
+        print(f"   ℹ️  Updated saved scan with {engagement_stats['fetched']} new or changed engagements"
+              + (f" (skipped {skipped} sample/demo)" if skipped else ""))
+    elif engagement_stats['samples'] > 0:
+        print(f"   ℹ️  Skipped {engagement_stats['samples']} sample/demo engagements")
+    print(f"   ✓ Scanned: {engagement_stats['scanned']}, Attributed: {engagement_stats['attributed']}, "
+          f"Unattributed: {unattributed_by_type['engagements']}\n")
+    
+    print(f"📋 CRM modifications (last {CRM_ACTIVITY_WINDOW_DAYS} days, {', '.join(CRM_OBJECT_TYPES)}):")
+    crm_total = sum(v['count'] for v in crm_activity.values())
+    if crm_probed_users is not None:
+        print(f"   ✓ Checked the {crm_probed_users} users with no recent engagements: "
+              f"{crm_total} owned records modified\n")
+    else:
+        print(f"   ✓ Found {crm_total} owned records modified\n")
     
     # Show unattributed warning
     total_unattributed = sum(unattributed_by_type.values())
@@ -390,7 +684,7 @@ def main():
             name = owner.get('email', 'Unknown')
         
         confidence, category, reason = calculate_confidence(
-            owner, login_history, engagement_activity, crm_activity
+            owner, login_history, engagement_activity, crm_activity, now=now
         )
         
         monthly_cost = SEAT_COST if confidence >= 70 else 0
@@ -413,13 +707,26 @@ def main():
     print("RESULTS")
     print("="*70 + "\n")
     
-    high_confidence = [r for r in results if r['confidence'] >= 95]
-    medium_high = [r for r in results if 70 <= r['confidence'] < 95]
-    active = [r for r in results if r['confidence'] < 70]
+    # Bucket users and total their costs in a single pass
+    high_confidence, medium_high, active = [], [], []
+    waste_high = waste_medium = 0
+    deactivated_count = high_inactive_count = 0
+    for r in results:
+        confidence = r['confidence']
+        is_deactivated = r['category'] == 'DEACTIVATED'
+        deactivated_count += is_deactivated
+        if confidence >= 95:
+            high_confidence.append(r)
+            waste_high += r['monthly_cost']
+            high_inactive_count += not is_deactivated
+        elif confidence >= 70:
+            medium_high.append(r)
+            waste_medium += r['monthly_cost']
+        else:
+            active.append(r)
     
     if high_confidence:
-        total_waste = sum(r['monthly_cost'] for r in high_confidence)
-        print(f"🚨 HIGH CONFIDENCE - REMOVE IMMEDIATELY ({len(high_confidence)} users, ${total_waste}/mo)")
+        print(f"🚨 HIGH CONFIDENCE - REMOVE IMMEDIATELY ({len(high_confidence)} users, ${waste_high}/mo)")
         print("-"*70)
         for i, r in enumerate(high_confidence[:10], 1):
             print(f"{i}. {r['name']} ({r['email']})")
@@ -429,8 +736,7 @@ def main():
             print(f"   ... and {len(high_confidence) - 10} more\n")
     
     if medium_high:
-        total_waste = sum(r['monthly_cost'] for r in medium_high)
-        print(f"⚠️  MEDIUM-HIGH CONFIDENCE ({len(medium_high)} users, ${total_waste}/mo)")
+        print(f"⚠️  MEDIUM-HIGH CONFIDENCE ({len(medium_high)} users, ${waste_medium}/mo)")
         print("-"*70)
         for i, r in enumerate(medium_high[:10], 1):
             print(f"{i}. {r['name']} ({r['email']})")
@@ -440,10 +746,6 @@ def main():
             print(f"   ... and {len(medium_high) - 10} more\n")
     
     if active:
-        total_engagements = sum(
-            engagement_activity.get(str(o.get('id')), {}).get('count', 0)
-            for o in active_owners
-        )
         print(f"✅ ACTIVE USERS ({len(active)} users)")
         print("-"*70)
         print(f"   Users with recent engagement or CRM activity")
@@ -451,15 +753,15 @@ def main():
     
     # Summary
     total_flagged = len(high_confidence) + len(medium_high)
-    total_waste = sum(r['monthly_cost'] for r in results if r['confidence'] >= 70)
+    total_waste = waste_high + waste_medium
     
     print("="*70)
     print("SUMMARY")
     print("="*70)
     print(f"Total users scanned: {len(results)}")
-    print(f"Deactivated: {len([r for r in results if r['category'] == 'DEACTIVATED'])}")
+    print(f"Deactivated: {deactivated_count}")
     if has_enterprise:
-        print(f"High confidence inactive: {len([r for r in high_confidence if r['category'] != 'DEACTIVATED'])}")
+        print(f"High confidence inactive: {high_inactive_count}")
     print(f"Medium-high confidence: {len(medium_high)}")
     print(f"Active users: {len(active)}")
     print(f"\nEstimated monthly waste: ${total_waste}")
@@ -478,7 +780,7 @@ def main():
         print("   - Overall accuracy: 70-80%")
     
     if total_unattributed > 0:
-        estimated_accuracy = max(50, 80 - (total_unattributed / max(1, sum(engagement_activity[o]['count'] for o in engagement_activity)) * 30))
+        estimated_accuracy = max(50, 80 - (total_unattributed / max(1, total_engagements) * 30))
         print(f"   - Reduced to ~{int(estimated_accuracy)}% due to {total_unattributed} unattributed engagements")
     
     print("\n💡 NEXT STEPS:")
@@ -490,4 +792,4 @@ def main():
     print("5. For inactive: Contact to verify if access still needed\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file